@@ -5,37 +5,180 @@ An IRC bot that provides private search functionality using the Hearch API
 with privacy protection and rate limiting.
 """
 
-import socket
+import asyncio
+import logging
+import re
 import ssl
+import threading
 import time
-import json
 import base64
-import requests
-from datetime import datetime, timedelta
-from collections import defaultdict, deque
+import httpx
+import orjson
+from collections import OrderedDict
 from typing import Dict, List, Optional
 
+# Static Hearch engine configuration - matches exactly the config from the
+# network request. Serialized and base64-encoded once at import time so the
+# hot search path doesn't rebuild/encode ~2 KB of constants per query.
+_HEARCH_CONFIG = {
+    "engines": {
+        "bing": {"enabled": True, "required": False, "requiredbyorigin": True, "preferred": False, "preferredbyorigin": False},
+        "brave": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": True, "preferredbyorigin": False},
+        "duckduckgo": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
+        "etools": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
+        "google": {"enabled": True, "required": False, "requiredbyorigin": True, "preferred": False, "preferredbyorigin": False},
+        "mojeek": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": True, "preferredbyorigin": False},
+        "presearch": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
+        "qwant": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
+        "startpage": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
+        "swisscows": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
+        "yahoo": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False}
+    },
+    "ranking": {
+        "rankexp": 0.5,
+        "rankmul": 1,
+        "rankconst": 0,
+        "rankscoremul": 1,
+        "rankscoreadd": 0,
+        "timesreturnedmul": 1,
+        "timesreturnedadd": 0,
+        "timesreturnedscoremul": 1,
+        "timesreturnedscoreadd": 0,
+        "engines": {
+            "bing": {"mul": 1.5, "add": 0},
+            "brave": {"mul": 1, "add": 0},
+            "duckduckgo": {"mul": 1.25, "add": 0},
+            "etools": {"mul": 1, "add": 0},
+            "google": {"mul": 1.5, "add": 0},
+            "mojeek": {"mul": 1, "add": 0},
+            "presearch": {"mul": 1.1, "add": 0},
+            "qwant": {"mul": 1.1, "add": 0},
+            "startpage": {"mul": 1.25, "add": 0},
+            "swisscows": {"mul": 1, "add": 0},
+            "yahoo": {"mul": 1.1, "add": 0}
+        }
+    },
+    "timings": {
+        "preferredtimeout": "500",
+        "hardtimeout": "1500"
+    }
+}
+
+# orjson emits compact JSON (no separator whitespace) by default
+_HEARCH_CONFIG_B64 = base64.b64encode(orjson.dumps(_HEARCH_CONFIG)).decode()
+
+# :nick!user@host PRIVMSG <target> :<message> - matched in one pass instead
+# of a chain of str.split calls that allocate throwaway lists per line
+_IRC_PRIVMSG_RE = re.compile(r'^:([^!]+)!\S+ PRIVMSG (\S+) :(.*)$')
+
+_WS_RE = re.compile(r'\s+')
+
+log = logging.getLogger('searchbot')
+
+# Result templates with the IRC color codes baked in:
+# green title, blue URL, gray description, \x0F resets formatting
+_RESULT_FMT = "{i}. \x0303{title}\x0F | \x0312{url}\x0F"
+_DESC_FMT = " | \x0314{desc}\x0F"
+
+def _ellipsize(s: str, n: int) -> str:
+    return s if len(s) <= n else s[:n - 3] + "..."
+
+_HEARCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/json',
+    'Origin': 'https://hearch.co',
+    'Referer': 'https://hearch.co/'
+}
+
+class _TokenBucket:
+    """Token bucket pacing for outbound IRC lines.
+
+    Refills at `rate` tokens per second up to `burst`, so short bursts go
+    out immediately while sustained output is held to the refill rate.
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1.0:
+                self.tokens -= 1.0
+                return
+            await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+class _SlidingWindowCounter:
+    """Sliding window counter over two fixed buckets.
+
+    Approximates a true sliding window by weighting the previous bucket's
+    count by its remaining overlap with the window. O(1) memory and O(1)
+    per check, regardless of request volume.
+    """
+    def __init__(self, window_size: float):
+        self.window_size = window_size
+        self.bucket_start = time.monotonic()
+        self.current_count = 0
+        self.prev_count = 0
+
+    def _roll(self, now: float):
+        elapsed = now - self.bucket_start
+        if elapsed >= self.window_size * 2:
+            # Both buckets are stale
+            self.prev_count = 0
+            self.current_count = 0
+            self.bucket_start = now
+        elif elapsed >= self.window_size:
+            self.prev_count = self.current_count
+            self.current_count = 0
+            self.bucket_start += self.window_size
+
+    def estimate(self, now: float) -> float:
+        self._roll(now)
+        fraction = (now - self.bucket_start) / self.window_size
+        return self.prev_count * (1.0 - fraction) + self.current_count
+
+    def increment(self, now: float):
+        self._roll(now)
+        self.current_count += 1
+
 class RateLimiter:
     def __init__(self, requests_per_minute: int, requests_per_day: int):
         self.requests_per_minute = requests_per_minute
         self.requests_per_day = requests_per_day
-        self.minute_window = deque()
-        self.day_window = deque()
-    
+        self.minute_window = _SlidingWindowCounter(60.0)
+        self.day_window = _SlidingWindowCounter(86400.0)
+        self._lock = threading.Lock()
+
     def can_make_request(self) -> bool:
-        now = datetime.now()
-        while self.minute_window and self.minute_window[0] < now - timedelta(minutes=1):
-            self.minute_window.popleft()
-        while self.day_window and self.day_window[0] < now - timedelta(days=1):
-            self.day_window.popleft()
-        
-        return (len(self.minute_window) < self.requests_per_minute and 
-                len(self.day_window) < self.requests_per_day)
-    
+        now = time.monotonic()
+        return (self.minute_window.estimate(now) < self.requests_per_minute and
+                self.day_window.estimate(now) < self.requests_per_day)
+
     def add_request(self):
-        now = datetime.now()
-        self.minute_window.append(now)
-        self.day_window.append(now)
+        now = time.monotonic()
+        self.minute_window.increment(now)
+        self.day_window.increment(now)
+
+    def try_acquire(self) -> bool:
+        """Atomically check capacity and record the request.
+
+        Checking and recording in one step closes the window where a slow
+        search between can_make_request() and add_request() lets extra
+        requests slip past the limit.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (self.minute_window.estimate(now) < self.requests_per_minute and
+                    self.day_window.estimate(now) < self.requests_per_day):
+                self.minute_window.increment(now)
+                self.day_window.increment(now)
+                return True
+            return False
 
 class SearchBot:
     def __init__(self):
@@ -45,411 +188,459 @@ class SearchBot:
         self.nickname = "SearchBot"
         self.channels = ["#test_room"]
         
-        # Rate Limiting - more conservative than MistralBot
-        self.rate_limiter = RateLimiter(
-            requests_per_minute=5,
-            requests_per_day=500
-        )
-        
-        # Store ongoing private searches
-        self.active_searches = {}
-        
+        # Rate Limiting - more conservative than MistralBot. Sharded per
+        # user nick so one flooder can't consume everyone's quota; the LRU
+        # bound keeps limiter memory fixed no matter how many nicks appear
+        self.requests_per_minute = 5
+        self.requests_per_day = 500
+        self._per_user_limiters = OrderedDict()  # nick -> RateLimiter
+        self._max_limiter_users = 1024
+
         # Store last search results for !searchn command
         self.last_search_results = {}  # user -> list of results
         self.search_index = {}  # user -> current index
+
+        # Short-lived LRU cache of results keyed by normalized query -
+        # popular queries repeat across users, and a hit skips both the
+        # HTTPS round-trip and the rate limiter
+        self._search_cache = OrderedDict()  # query -> (expiry, results)
+        self._search_cache_max = 256
+        self._search_cache_ttl = 300.0  # seconds
         
-        # SSL Configuration
+        # SSL Configuration - one context per peer, built once. Reusing the
+        # same context across reconnects lets TLS session tickets turn a
+        # full handshake into an abbreviated one
         self.ssl_context = ssl.create_default_context()
+        self.ssl_context.minimum_version = ssl.TLSVersion.TLSv1_2
+        # IRC networks commonly run self-signed certs
         self.ssl_context.check_hostname = False
         self.ssl_context.verify_mode = ssl.CERT_NONE
 
-    def connect(self) -> bool:
+        # The API context keeps full certificate verification and offers
+        # ALPN for the HTTP/2 client below
+        self._api_ssl_context = ssl.create_default_context()
+        self._api_ssl_context.minimum_version = ssl.TLSVersion.TLSv1_2
+        self._api_ssl_context.set_alpn_protocols(['h2', 'http/1.1'])
+
+        # Async HTTP client with connection pooling and HTTP/2 - reuses
+        # keep-alive sockets/TLS sessions and lets searches run concurrently
+        # with the IRC loop instead of blocking it. When a custom transport
+        # is supplied the client ignores its own http2/verify/limits kwargs,
+        # so everything except the timeout is built into the transport
+        self._http = httpx.AsyncClient(
+            timeout=httpx.Timeout(10.0, connect=3.05),
+            transport=httpx.AsyncHTTPTransport(
+                retries=2,
+                http2=True,
+                verify=self._api_ssl_context,
+                limits=httpx.Limits(max_connections=8, max_keepalive_connections=4)
+            )
+        )
+
+        # IRC stream endpoints, set up by connect()
+        self.reader = None
+        self.writer = None
+
+        # Outbound PRIVMSG queue drained by _sender() under a token bucket -
+        # flood protection without blocking the handlers
+        self._send_q = asyncio.Queue()
+        self._bucket = _TokenBucket(rate=2.0, burst=5)
+
+        # Strong references to in-flight handler tasks - the event loop only
+        # keeps weak ones, so an unreferenced task can be garbage collected
+        # before it finishes
+        self._handler_tasks = set()
+
+    async def connect(self) -> bool:
         """Establish connection to the IRC server"""
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.irc = self.ssl_context.wrap_socket(sock)
-            
-            print(f"Connecting to {self.server}:{self.port}...")
-            self.irc.connect((self.server, self.port))
-            
+            log.info("Connecting to %s:%s...", self.server, self.port)
+            self.reader, self.writer = await asyncio.open_connection(
+                self.server, self.port, ssl=self.ssl_context
+            )
+
             self.send(f"NICK {self.nickname}")
             self.send(f"USER {self.nickname} 0 * :MansionNet Search Bot")
-            
+
+            # Process the handshake line by line, same as the main loop -
+            # scanning the whole accumulated buffer on every recv is
+            # quadratic in the length of the welcome banner
             buffer = ""
             while True:
-                temp = self.irc.recv(2048).decode("UTF-8")
-                buffer += temp
-                
-                if "PING" in buffer:
-                    ping_token = buffer[buffer.find("PING"):].split()[1]
-                    self.send(f"PONG {ping_token}")
-                
-                if "001" in buffer:  # RPL_WELCOME
-                    for channel in self.channels:
-                        self.send(f"JOIN {channel}")
-                        time.sleep(1)
-                    return True
-                
-                if "Closing Link" in buffer or "ERROR" in buffer:
+                data = await self.reader.read(2048)
+                if not data:
                     return False
-                
+                buffer += data.decode("UTF-8", errors="replace")
+                lines = buffer.split("\r\n")
+                buffer = lines.pop()
+
+                for line in lines:
+                    if line.startswith("PING"):
+                        self.send(f"PONG {line.split(None, 1)[1]}")
+                    elif " 001 " in line:  # RPL_WELCOME
+                        for channel in self.channels:
+                            self.send(f"JOIN {channel}")
+                            await asyncio.sleep(1)
+                        return True
+                    elif "Closing Link" in line or line.startswith("ERROR"):
+                        return False
+
         except Exception as e:
-            print(f"Connection error: {str(e)}")
+            log.error("Connection error: %s", e)
             return False
 
     def send(self, message: str):
         """Send a raw message to the IRC server"""
         try:
-            self.irc.send(bytes(f"{message}\r\n", "UTF-8"))
-            print(f"Sent: {message}")
+            self.writer.write(bytes(f"{message}\r\n", "UTF-8"))
+            log.debug("Sent: %s", message)
         except Exception as e:
-            print(f"Error sending message: {str(e)}")
+            log.error("Error sending message: %s", e)
+
+    async def _sender(self):
+        """Drain the outbound queue, pacing lines through the token bucket"""
+        while True:
+            line = await self._send_q.get()
+            await self._bucket.acquire()
+            try:
+                self.writer.write(bytes(f"{line}\r\n", "UTF-8"))
+                await self.writer.drain()
+                log.debug("Sent: %s", line)
+            except Exception as e:
+                log.error("Error sending queued message: %s", e)
+
+    def _queue_message(self, target: str, message: str):
+        """Split a message into PRIVMSG-sized chunks and queue them for sending"""
+        # Split long messages to avoid truncation. Walk the string with an
+        # index and search for break points in place - no per-chunk slice
+        # copies of the remaining message
+        max_length = 400  # IRC message length limit with safety margin
+        prefix = f"PRIVMSG {target} :"
+        i = 0
+        n = len(message)
+
+        while i < n:
+            end = i + max_length
+            if end >= n:
+                split_point = n
+            else:
+                # Find a good breaking point
+                split_point = message.rfind(' ', i, end)
+                if split_point <= i:
+                    split_point = end
+
+            self._send_q.put_nowait(prefix + message[i:split_point])
+            i = split_point
+            while i < n and message[i] == ' ':
+                i += 1
 
     def send_private_message(self, target: str, message: str):
         """Send a private message to a user"""
-        try:
-            # Split long messages to avoid truncation
-            max_length = 400  # IRC message length limit with safety margin
-            
-            while message:
-                if len(message) <= max_length:
-                    self.send(f"PRIVMSG {target} :{message}")
-                    break
-                
-                # Find a good breaking point
-                split_point = message[:max_length].rfind(' ')
-                if split_point == -1:
-                    split_point = max_length
-                
-                self.send(f"PRIVMSG {target} :{message[:split_point]}")
-                message = message[split_point:].lstrip()
-                time.sleep(0.5)  # Avoid flooding
-                
-        except Exception as e:
-            print(f"Error sending private message: {str(e)}")
-            self.send(f"PRIVMSG {target} :Error: Message delivery failed.")
+        self._queue_message(target, message)
+
+    def get_limiter(self, nick: str) -> RateLimiter:
+        """Return the rate limiter for a nick, creating it on first use"""
+        limiter = self._per_user_limiters.get(nick)
+        if limiter is None:
+            limiter = RateLimiter(
+                requests_per_minute=self.requests_per_minute,
+                requests_per_day=self.requests_per_day
+            )
+            self._per_user_limiters[nick] = limiter
+            if len(self._per_user_limiters) > self._max_limiter_users:
+                self._per_user_limiters.popitem(last=False)
+        else:
+            self._per_user_limiters.move_to_end(nick)
+        return limiter
+
+    def _cache_get(self, query: str) -> Optional[List[Dict]]:
+        """Return cached results for a normalized query, or None"""
+        entry = self._search_cache.get(query)
+        if entry is None:
+            return None
+        expiry, results = entry
+        if time.monotonic() >= expiry:
+            del self._search_cache[query]
+            return None
+        self._search_cache.move_to_end(query)
+        return results
+
+    def _cache_put(self, query: str, results: List[Dict]):
+        """Cache results for a normalized query, evicting the oldest entry"""
+        self._search_cache[query] = (time.monotonic() + self._search_cache_ttl, results)
+        self._search_cache.move_to_end(query)
+        if len(self._search_cache) > self._search_cache_max:
+            self._search_cache.popitem(last=False)
+
+    async def _cached_search(self, sender: str, query: str) -> Optional[List[Dict]]:
+        """Search with caching and per-user rate limiting.
+
+        Cache hits are served without touching the rate limiter, since they
+        make no API call. Returns None when the sender's limit is exhausted.
+        """
+        cache_key = ' '.join(query.lower().split())
+        results = self._cache_get(cache_key)
+        if results is not None:
+            return results
 
-    def search_hearch(self, query: str) -> List[Dict]:
+        if not self.get_limiter(sender).try_acquire():
+            return None
+
+        results = await self.search_hearch(query)
+        if results:
+            self._cache_put(cache_key, results)
+        return results
+
+    async def search_hearch(self, query: str) -> List[Dict]:
         """Perform a search using the Hearch API"""
         try:
-            # Match exactly the config from the network request
-            config = {
-                "engines": {
-                    "bing": {"enabled": True, "required": False, "requiredbyorigin": True, "preferred": False, "preferredbyorigin": False},
-                    "brave": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": True, "preferredbyorigin": False},
-                    "duckduckgo": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
-                    "etools": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
-                    "google": {"enabled": True, "required": False, "requiredbyorigin": True, "preferred": False, "preferredbyorigin": False},
-                    "mojeek": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": True, "preferredbyorigin": False},
-                    "presearch": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
-                    "qwant": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
-                    "startpage": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
-                    "swisscows": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False},
-                    "yahoo": {"enabled": True, "required": False, "requiredbyorigin": False, "preferred": False, "preferredbyorigin": False}
-                },
-                "ranking": {
-                    "rankexp": 0.5,
-                    "rankmul": 1,
-                    "rankconst": 0,
-                    "rankscoremul": 1,
-                    "rankscoreadd": 0,
-                    "timesreturnedmul": 1,
-                    "timesreturnedadd": 0,
-                    "timesreturnedscoremul": 1,
-                    "timesreturnedscoreadd": 0,
-                    "engines": {
-                        "bing": {"mul": 1.5, "add": 0},
-                        "brave": {"mul": 1, "add": 0},
-                        "duckduckgo": {"mul": 1.25, "add": 0},
-                        "etools": {"mul": 1, "add": 0},
-                        "google": {"mul": 1.5, "add": 0},
-                        "mojeek": {"mul": 1, "add": 0},
-                        "presearch": {"mul": 1.1, "add": 0},
-                        "qwant": {"mul": 1.1, "add": 0},
-                        "startpage": {"mul": 1.25, "add": 0},
-                        "swisscows": {"mul": 1, "add": 0},
-                        "yahoo": {"mul": 1.1, "add": 0}
-                    }
-                },
-                "timings": {
-                    "preferredtimeout": "500",
-                    "hardtimeout": "1500"
-                }
-            }
-            
-            # Base64 encode the config
-            config_b64 = base64.b64encode(json.dumps(config).encode()).decode()
-            
             # Build the URL with correct query parameters
             params = {
-                'category': config_b64,
+                'category': _HEARCH_CONFIG_B64,
                 'pages': '1',
                 'q': query,
                 'start': '1'
             }
             
             url = 'https://api.hearch.co/search/web'
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'application/json',
-                'Origin': 'https://hearch.co',
-                'Referer': 'https://hearch.co/'
-            }
-            
-            print(f"\nDebug - Making request to: {url}")
-            print(f"Debug - Query: {query}")
-            print(f"Debug - Full URL with params: {url}?{'&'.join(f'{k}={v}' for k, v in params.items())}")
-            
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            
-            print(f"Debug - Response status: {response.status_code}")
-            print(f"Debug - Response headers: {dict(response.headers)}")
-            print(f"Debug - Response content: {response.text[:500]}")
-            
+
+            # %-style deferred formatting: none of these argument reprs are
+            # built unless DEBUG logging is actually enabled
+            log.debug("Making request to: %s (query: %r)", url, query)
+
+            response = await self._http.get(url, params=params, headers=_HEARCH_HEADERS)
+
+            log.debug("Response status: %s", response.status_code)
+            log.debug("Response headers: %s", response.headers)
+            log.debug("Response content: %.500s", response.content)
+
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 results = data.get('results', [])
-                print(f"Debug - Found {len(results)} results")
+                log.debug("Found %d results", len(results))
                 return results[:5]
             else:
-                print(f"API Error: {response.status_code} - {response.text}")
+                log.error("API Error: %s - %s", response.status_code, response.text)
                 return []
-                        
-        except Exception as e:
-            print(f"Search error: {str(e)}")
-            return []
-                        
-        except Exception as e:
-            print(f"Search error: {str(e)}")
+
+        # Narrow to transport and decode failures - programming errors
+        # should surface instead of being swallowed
+        except (httpx.HTTPError, ValueError) as e:
+            log.error("Search error: %s", e)
             return []
 
     def format_search_result(self, index: int, result: dict) -> str:
         """Format a single search result with IRC colors"""
-        # IRC color codes
-        BOLD = '\x02'          # Bold text
-        COLOR = '\x03'         # Color indicator
-        RESET = '\x0F'         # Reset formatting
-        BLUE = '12'           # Blue for URLs
-        GREEN = '03'          # Green for titles
-        GRAY = '14'           # Gray for descriptions
-        
         title = result.get('title', 'No title').strip()
         url = result.get('url', 'No URL').strip()
         desc = result.get('description', '').strip()
-        
-        # Clean up description (remove duplicate URLs and unnecessary text)
-        desc = desc.replace(url, '')
-        desc = ' '.join(desc.split())  # Normalize whitespace
-        
+
+        # Clean up description (remove duplicate URLs, normalize whitespace)
+        desc = _WS_RE.sub(' ', desc.replace(url, '')).strip()
+
         # Keep lengths reasonable but longer than before
-        if len(title) > 100:
-            title = title[:97] + "..."
-        if len(url) > 100:
-            url = url[:97] + "..."
-        if len(desc) > 200:  # Allow longer descriptions
-            desc = desc[:197] + "..."
-        
-        # Format result with colors
-        result_line = (
-            f"{index}. {COLOR}{GREEN}{title}{RESET} | "  # Green title
-            f"{COLOR}{BLUE}{url}{RESET}"                 # Blue URL
+        result_line = _RESULT_FMT.format(
+            i=index,
+            title=_ellipsize(title, 100),
+            url=_ellipsize(url, 100)
         )
-        
-        if desc and len(desc) > 20:  # Only add if description is meaningful
-            result_line += f" | {COLOR}{GRAY}{desc}{RESET}"  # Gray description
-            
+
+        if len(desc) > 20:  # Only add if description is meaningful
+            result_line += _DESC_FMT.format(desc=_ellipsize(desc, 200))
+
         return result_line
 
-    def handle_private_message(self, sender: str, message: str):
+    async def handle_private_message(self, sender: str, message: str):
         """Handle private messages and search commands"""
         try:
             if message.startswith("!search "):
-                if not self.rate_limiter.can_make_request():
-                    self.send_private_message(sender, "Rate limit exceeded. Please try again later.")
-                    return
-                
                 query = message[8:].strip()
                 if not query:
                     self.send_private_message(sender, "Usage: !search <query>")
                     return
-                
+
                 # Perform search and send results privately
-                results = self.search_hearch(query)
-                self.rate_limiter.add_request()
-                
+                results = await self._cached_search(sender, query)
+                if results is None:
+                    self.send_private_message(sender, "Rate limit exceeded. Please try again later.")
+                    return
+
                 if not results:
                     self.send_private_message(sender, "No results found.")
                     return
-                
-                # Send each result as a separate message
+
+                # Send each result as a separate message; the token-bucket
+                # sender handles the pacing between them
                 for i, result in enumerate(results[:5], 1):
                     formatted_result = self.format_search_result(i, result)
                     self.send_private_message(sender, formatted_result)
-                    time.sleep(0.5)  # Small delay between messages to prevent flooding
-                
+
                 # Add attribution message
                 GRAY = '\x0314'  # IRC color code for gray
                 BLUE = '\x0312'  # IRC color code for blue
                 RESET = '\x0F'   # Reset formatting
                 attribution = f"{GRAY}Search results powered by {BLUE}https://hearch.co/{GRAY} - Privacy-focused metasearch{RESET}"
-                time.sleep(0.5)  # Small delay before attribution
                 self.send_private_message(sender, attribution)
-                
+
             elif message == "!help":
                 help_msg = ("SearchBot Commands: "
                           "!search <query> - Search the web privately (results sent via PM) | "
                           "!help - Show this help message")
                 self.send_private_message(sender, help_msg)
-                
+
         except Exception as e:
-            print(f"Error handling private message: {str(e)}")
+            log.error("Error handling private message: %s", e)
             self.send_private_message(sender, "An error occurred processing your request.")
 
     def send_channel_message(self, channel: str, message: str):
         """Send a message to a channel"""
-        try:
-            # Split long messages to avoid truncation
-            max_length = 400  # IRC message length limit with safety margin
-            
-            while message:
-                if len(message) <= max_length:
-                    self.send(f"PRIVMSG {channel} :{message}")
-                    break
-                
-                # Find a good breaking point
-                split_point = message[:max_length].rfind(' ')
-                if split_point == -1:
-                    split_point = max_length
-                
-                self.send(f"PRIVMSG {channel} :{message[:split_point]}")
-                message = message[split_point:].lstrip()
-                time.sleep(0.5)  # Avoid flooding
-                
-        except Exception as e:
-            print(f"Error sending channel message: {str(e)}")
+        self._queue_message(channel, message)
 
-    def handle_channel_message(self, sender: str, channel: str, message: str):
+    async def handle_channel_message(self, sender: str, channel: str, message: str):
         """Handle channel messages"""
         try:
             if message.startswith("!search "):
-                if not self.rate_limiter.can_make_request():
-                    self.send_channel_message(channel, f"{sender}: Rate limit exceeded. Please try again later.")
-                    return
-                
                 query = message[8:].strip()
                 if not query:
                     self.send_channel_message(channel, f"{sender}: Usage: !search <query>")
                     return
-                
+
                 # Perform search and store results
-                results = self.search_hearch(query)
-                self.rate_limiter.add_request()
-                
+                results = await self._cached_search(sender, query)
+                if results is None:
+                    self.send_channel_message(channel, f"{sender}: Rate limit exceeded. Please try again later.")
+                    return
+
                 if not results:
                     self.send_channel_message(channel, f"{sender}: No results found.")
                     return
-                
+
                 # Store results for !searchn command
                 self.last_search_results[sender] = results
                 self.search_index[sender] = 0
-                
+
                 # Send only the first result
                 formatted_result = self.format_search_result(1, results[0])
                 self.send_channel_message(channel, f"{sender}: {formatted_result}")
-                
+
                 # Add note about more results
                 if len(results) > 1:
                     self.send_channel_message(channel, f"{sender}: Use !searchn to see the next result ({len(results)-1} more available)")
-                
+
                 # Add attribution message
                 GRAY = '\x0314'  # IRC color code for gray
                 BLUE = '\x0312'  # IRC color code for blue
                 RESET = '\x0F'   # Reset formatting
                 attribution = f"{GRAY}Search results powered by {BLUE}https://hearch.co/{GRAY} - Privacy-focused metasearch{RESET}"
-                time.sleep(0.5)  # Small delay before attribution
                 self.send_channel_message(channel, attribution)
-                
+
             elif message == "!searchn":
                 if sender not in self.last_search_results or not self.last_search_results[sender]:
                     self.send_channel_message(channel, f"{sender}: No previous search found. Use !search <query> first.")
                     return
-                
+
                 results = self.last_search_results[sender]
                 current_index = self.search_index.get(sender, 0)
-                
+
                 if current_index >= len(results) - 1:
                     self.send_channel_message(channel, f"{sender}: No more results. All {len(results)} results have been shown.")
                     return
-                
+
                 # Show next result
                 current_index += 1
                 self.search_index[sender] = current_index
                 formatted_result = self.format_search_result(current_index + 1, results[current_index])
                 self.send_channel_message(channel, f"{sender}: {formatted_result}")
-                
+
                 # Add note about remaining results
                 remaining = len(results) - current_index - 1
                 if remaining > 0:
                     self.send_channel_message(channel, f"{sender}: Use !searchn again for the next result ({remaining} more available)")
-                
+
             elif message == "!help":
                 help_msg = ("SearchBot Commands: "
                           "!search <query> - Search the web (shows first result in channel) | "
                           "!searchn - Show next result from previous search | "
                           "!help - Show this help message")
                 self.send_channel_message(channel, help_msg)
-                
+
         except Exception as e:
-            print(f"Error handling channel message: {str(e)}")
+            log.error("Error handling channel message: %s", e)
             self.send_channel_message(channel, f"{sender}: An error occurred processing your request.")
 
-    def run(self):
+    async def run(self):
         """Main bot loop"""
         while True:
             try:
-                if self.connect():
-                    buffer = ""
-                    
-                    while True:
-                        try:
-                            buffer += self.irc.recv(2048).decode("UTF-8")
-                            lines = buffer.split("\r\n")
-                            buffer = lines.pop()
-                            
-                            for line in lines:
-                                print(line)  # Debug output
-                                
-                                if line.startswith("PING"):
-                                    ping_token = line.split()[1]
-                                    self.send(f"PONG {ping_token}")
-                                
-                                if "PRIVMSG" in line:
-                                    sender = line.split("!")[0][1:]
-                                    try:
-                                        msg_parts = line.split("PRIVMSG ", 1)[1]
-                                        target, message = msg_parts.split(":", 1)
-                                        target = target.strip()
-                                        message = message.strip()
-                                        
-                                        # Handle private messages differently from channel messages
-                                        if target == self.nickname:
-                                            self.handle_private_message(sender, message)
-                                        elif target in self.channels:
-                                            self.handle_channel_message(sender, target, message)
-                                            
-                                    except IndexError:
-                                        continue
-                                        
-                        except UnicodeDecodeError:
-                            buffer = ""
-                            continue
-                            
+                if await self.connect():
+                    sender_task = asyncio.create_task(self._sender())
+
+                    # Mutable byte accumulator: extending a bytearray is
+                    # amortized O(1), unlike str += which recopies the whole
+                    # buffer per packet, and UTF-8 decode happens only on the
+                    # small per-line slice
+                    buf = bytearray()
+
+                    try:
+                        await self._read_loop(buf)
+                    finally:
+                        sender_task.cancel()
+
             except Exception as e:
-                print(f"Error in main loop: {str(e)}")
-                time.sleep(30)
+                log.error("Error in main loop: %s", e)
+                await asyncio.sleep(30)
                 continue
 
+    def _spawn_handler(self, coro):
+        """Run a message handler as a task, holding a reference until done"""
+        task = asyncio.create_task(coro)
+        self._handler_tasks.add(task)
+        task.add_done_callback(self._handler_tasks.discard)
+        return task
+
+    async def _read_loop(self, buf: bytearray):
+        """Read and dispatch IRC lines until the connection drops"""
+        while True:
+            data = await self.reader.read(4096)
+            if not data:
+                break  # Connection closed, reconnect
+
+            buf += data
+            start = 0
+            while True:
+                end = buf.find(b"\r\n", start)
+                if end < 0:
+                    break
+                line = buf[start:end].decode("UTF-8", errors="replace")
+                start = end + 2
+
+                log.debug("%s", line)
+
+                if line.startswith("PING"):
+                    ping_token = line.split()[1]
+                    self.send(f"PONG {ping_token}")
+
+                if "PRIVMSG" in line:
+                    match = _IRC_PRIVMSG_RE.match(line)
+                    if match:
+                        sender, target, message = match.groups()
+                        message = message.strip()
+
+                        # Handle private messages differently from channel messages.
+                        # Fired as tasks so a slow search never blocks the
+                        # read loop (or PING replies) for other users.
+                        if target == self.nickname:
+                            self._spawn_handler(self.handle_private_message(sender, message))
+                        elif target in self.channels:
+                            self._spawn_handler(self.handle_channel_message(sender, target, message))
+
+            # Drop all fully-processed bytes in one pass
+            del buf[:start]
+
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
     bot = SearchBot()
-    bot.run()
+    asyncio.run(bot.run())